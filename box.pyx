@@ -0,0 +1,141 @@
+# cython: language_level=3
+cimport cython
+from libc.math cimport sqrt
+
+import numpy as np
+
+
+cdef class Box:
+    """Assumes origin (0, 0) is in bottom-left corner."""
+
+    cdef readonly double x1, y1, x2, y2
+    # Geometry is computed once on construction, since boxes are immutable
+    cdef readonly double width, height, center_x, center_y
+
+    def __cinit__(self, double x1, double y1, double x2, double y2):
+        self.x1 = x1
+        self.y1 = y1
+        self.x2 = x2
+        self.y2 = y2
+        self.center_x = (x1 + x2) / 2
+        self.center_y = (y1 + y2) / 2
+        self.width = x2 - x1
+        self.height = y2 - y1
+
+    def __str__(self) -> str:
+        return (
+            f"Box(x1={self.x1:.3f}, "
+            f"y1={self.y1:.3f}, "
+            f"x2={self.x2:.3f}, "
+            f"y2={self.y2:.3f})"
+        )
+
+    def __repr__(self) -> str:
+        return f"Box(x1={self.x1!r}, y1={self.y1!r}, x2={self.x2!r}, y2={self.y2!r})"
+
+    def __eq__(self, other):
+        if not isinstance(other, Box):
+            return NotImplemented
+        cdef Box o = <Box>other
+        return (
+            self.x1 == o.x1 and self.y1 == o.y1 and self.x2 == o.x2 and self.y2 == o.y2
+        )
+
+    def __hash__(self):
+        return hash(self.as_tuple())
+
+    def __reduce__(self):
+        return (Box, self.as_tuple())
+
+    @staticmethod
+    def to_structured_array(list boxes):
+        """Copy the coordinates of `boxes` into a contiguous (N, 4) float64 array
+        of (x1, y1, x2, y2) rows."""
+        cdef Py_ssize_t i, n = len(boxes)
+        cdef Box b
+        arr = np.empty((n, 4), dtype=np.float64)
+        cdef double[:, ::1] out = arr
+        for i in range(n):
+            b = <Box?>boxes[i]
+            out[i, 0] = b.x1
+            out[i, 1] = b.y1
+            out[i, 2] = b.x2
+            out[i, 3] = b.y2
+        return arr
+
+    @property
+    def center(self):
+        """The (x, y) center as a tuple. Use `center_x`/`center_y` to avoid
+        building the tuple when the values are used separately."""
+        return self.center_x, self.center_y
+
+    cpdef tuple as_tuple(self):
+        return (self.x1, self.y1, self.x2, self.y2)
+
+    @property
+    def size(self):
+        return (self.width, self.height)
+
+    @cython.nonecheck(True)
+    cpdef double hdist(self, Box other) except? -1:
+        """Distance between right side of this box and left side of other box.
+
+        If boxes are in the same column and text is perfectly justified,
+        and `self` is above `other`, this will return -(width)"""
+        return other.x1 - self.x2
+
+    @cython.nonecheck(True)
+    cpdef double vdist(self, Box other) except? -1:
+        """Distance between bottom of this box and top of other box.
+
+        If boxes are on the same line and `self` is before `other`,
+        this will return -(height)."""
+        return self.y1 - other.y2
+
+    @cython.nonecheck(True)
+    cpdef double sq_dist_between_centers(self, Box other) except? -1:
+        """Squared distance between the center of this box and the center of other box.
+
+        Prefer this when only comparing distances (e.g. finding the nearest box),
+        since it skips the square root."""
+        cdef double dx = self.center_x - other.center_x
+        cdef double dy = self.center_y - other.center_y
+        return dx * dx + dy * dy
+
+    @cython.nonecheck(True)
+    cpdef double dist_between_centers(self, Box other) except? -1:
+        """Distance between the center of this box and the center of other box."""
+        return sqrt(self.sq_dist_between_centers(other))
+
+    @cython.nonecheck(True)
+    cpdef bint precedes_x(self, Box other, double tol=0.0) except -1:
+        """As defined by Thick Boundary Rectangle Relations (TBRR) in
+        'M. Aiello et. al.: Document understanding for a broad class of documents'"""
+        return self.x2 < (other.x1 - tol)
+
+    @cython.nonecheck(True)
+    cpdef bint precedes_y(self, Box other, double tol=0.0) except -1:
+        """As defined by Thick Boundary Rectangle Relations (TBRR) in
+        'M. Aiello et. al.: Document understanding for a broad class of documents'
+
+        Note: A few *very important* changes happen if we declare a bottom-left origin.
+          - The y1 and y2 positions are flipped compared to the original paper,
+            so `a` preceeding `b` means `a` appears above b, implying a higher y1-value,
+            since y1 is the 'bottom' (equivalent to 'right' in the x-direction) of `a`
+            (while y2 is the 'top' of `b`).
+          - This also means we add the tolerance to y2 (not subtract it)
+          - This also means we flip the sign of the inequality."""
+        return self.y1 > (other.y2 + tol)
+
+    cpdef tuple to_xywh(self):
+        """Converts this box to a (x1, y1, width, height) tuple.
+        This representation is used in computer vision tasks
+        as well as SVG representations.
+        Also note that in those representations,
+        the origin is upper-left, so a correct y-position might
+        need to be calculated by subtracting from the height."""
+        return (self.x1, self.y1, self.width, self.height)
+
+    cpdef tuple scale_coords(self, double factor):
+        """Scale the coordinates of this box by `factor` and return them as a tuple."""
+        return (self.x1 * factor, self.y1 * factor, self.x2 * factor, self.y2 * factor)
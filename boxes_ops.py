@@ -0,0 +1,132 @@
+"""Pairwise versions of the `Box` distance and TBRR methods, computed over
+columns of box coordinates instead of one pair of `Box` objects at a time.
+
+Every pairwise function returns an (N, N) array where element [i, j] is the
+result of calling the `Box` method on `boxes[i]` with `boxes[j]` as `other`."""
+from typing import List, Tuple, Union
+
+import numpy as np
+
+from box import Box
+
+Tolerance = Union[float, np.ndarray]
+
+
+class BoxArray:
+    """Many boxes stored as one contiguous (N, 4) array of (x1, y1, x2, y2) rows,
+    rather than as a list of `Box` objects. Same bottom-left origin as `Box`."""
+
+    def __init__(self, coords: np.ndarray):
+        coords = np.ascontiguousarray(coords, dtype=np.float64)
+        if coords.ndim != 2 or coords.shape[1] != 4:
+            raise ValueError(
+                f"Expected an (N, 4) array of box coordinates, got shape {coords.shape}."
+            )
+        self.coords = coords
+
+    @classmethod
+    def from_boxes(cls, boxes: List[Box]) -> "BoxArray":
+        return cls(Box.to_structured_array(list(boxes)))
+
+    def to_boxes(self) -> List[Box]:
+        return [Box(*row) for row in self.coords.tolist()]
+
+    def __len__(self) -> int:
+        return len(self.coords)
+
+    @property
+    def x1(self) -> np.ndarray:
+        return self.coords[:, 0]
+
+    @property
+    def y1(self) -> np.ndarray:
+        return self.coords[:, 1]
+
+    @property
+    def x2(self) -> np.ndarray:
+        return self.coords[:, 2]
+
+    @property
+    def y2(self) -> np.ndarray:
+        return self.coords[:, 3]
+
+    def widths(self) -> np.ndarray:
+        return self.x2 - self.x1
+
+    def heights(self) -> np.ndarray:
+        return self.y2 - self.y1
+
+    def centers(self) -> np.ndarray:
+        """An (N, 2) array of (x, y) centers."""
+        return (self.coords[:, :2] + self.coords[:, 2:]) / 2
+
+    def scale(self, factor: float) -> "BoxArray":
+        return BoxArray(self.coords * factor)
+
+    def pairwise_hdist(self) -> np.ndarray:
+        return pairwise_hdist(self.x1, self.x2)
+
+
+Boxes = Union[List[Box], BoxArray]
+
+
+def boxes_to_array(boxes: Boxes) -> np.ndarray:
+    """Collect box coordinates into an (N, 4) array of (x1, y1, x2, y2) rows."""
+    if isinstance(boxes, BoxArray):
+        return boxes.coords
+    return Box.to_structured_array(list(boxes))
+
+
+def boxes_to_columns(
+    boxes: Boxes,
+) -> Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+    """Split boxes into contiguous x1, y1, x2 and y2 arrays."""
+    x1, y1, x2, y2 = np.ascontiguousarray(boxes_to_array(boxes).T)
+    return x1, y1, x2, y2
+
+
+def _row_tolerance(tol: Tolerance) -> np.ndarray:
+    """A tolerance can be shared by all boxes or given per box (i.e. per row)."""
+    return np.reshape(tol, (-1, 1))
+
+
+def pairwise_hdist(x1: np.ndarray, x2: np.ndarray) -> np.ndarray:
+    """Pairwise `Box.hdist`: left side of box j minus right side of box i."""
+    return x1[np.newaxis, :] - x2[:, np.newaxis]
+
+
+def pairwise_vdist(y1: np.ndarray, y2: np.ndarray) -> np.ndarray:
+    """Pairwise `Box.vdist`: bottom of box i minus top of box j."""
+    return y1[:, np.newaxis] - y2[np.newaxis, :]
+
+
+def pairwise_precedes_x(
+    x1: np.ndarray, x2: np.ndarray, tol: Tolerance = 0.0
+) -> np.ndarray:
+    """Pairwise `Box.precedes_x`, with `tol` either a scalar or one value per box i."""
+    return x2[:, np.newaxis] < (x1[np.newaxis, :] - _row_tolerance(tol))
+
+
+def pairwise_precedes_y(
+    y1: np.ndarray, y2: np.ndarray, tol: Tolerance = 0.0
+) -> np.ndarray:
+    """Pairwise `Box.precedes_y`, with `tol` either a scalar or one value per box i.
+
+    See `Box.precedes_y` for why the inequality is flipped for a bottom-left origin."""
+    return y1[:, np.newaxis] > (y2[np.newaxis, :] + _row_tolerance(tol))
+
+
+def pairwise_center_sq_dist(cx: np.ndarray, cy: np.ndarray) -> np.ndarray:
+    """Pairwise `Box.sq_dist_between_centers`."""
+    dx = cx[:, np.newaxis] - cx[np.newaxis, :]
+    dy = cy[:, np.newaxis] - cy[np.newaxis, :]
+    dx *= dx
+    dy *= dy
+    dx += dy
+    return dx
+
+
+def pairwise_center_dist(cx: np.ndarray, cy: np.ndarray) -> np.ndarray:
+    """Pairwise `Box.dist_between_centers`."""
+    dist = pairwise_center_sq_dist(cx, cy)
+    return np.sqrt(dist, out=dist)
@@ -1,7 +1,7 @@
 import base64
+from functools import lru_cache
 from io import BytesIO
 from itertools import repeat
-from operator import mul
 from typing import List, Literal, NewType, Optional, Tuple, Union
 
 
@@ -9,7 +9,7 @@ import pypdfium2 as pdfium
 from PIL import Image, ImageDraw, ImageFont
 from rich import print
 
-from box import Box
+from boxes_ops import Boxes, boxes_to_array
 
 PILImage = Image.Image
 PdfPage = pdfium.PdfPage
@@ -28,29 +28,41 @@ def _circle_bbox(
     return (cx - radius), (cy - radius), (cx + radius), (cy + radius)
 
 
-def _scale_coords(coordinates: Tuple[float, ...], factor: float) -> Tuple[float, ...]:
-    """Scale the coordinates by `factor`."""
-    return tuple(map(mul, coordinates, repeat(factor)))
+def _b64_encode_image(image: PILImage, format="png") -> str:
+    buffered = BytesIO()
+    save_kwargs = {}
+    if format == "png":
+        # The default zlib level (6) dominates SVG render time, for a small size win
+        save_kwargs = {"optimize": False, "compress_level": 1}
+    elif format == "jpeg":
+        save_kwargs = {"quality": 80, "optimize": True, "progressive": False}
+    image.save(buffered, format=format, **save_kwargs)
+    # `getbuffer` is a view of the encoded bytes, so we avoid copying them again
+    img_str = base64.b64encode(buffered.getbuffer()).decode()
+    return img_str
 
 
-def _invert_coords(
-    coordinates: Tuple[float, float], height: float
-) -> Tuple[float, float]:
-    """Invert an (x, y) coordinate pair.
-    For going from bottom-left to top-left origin orientations."""
-    x, y = coordinates
-    return (x, height - y)
+def _as_rgba(color) -> RGBA:
+    """Colors are looked up in caches and formatted as hex, so they need to be
+    hashable tuples of ints, even if they were given as lists or with float components."""
+    return tuple(int(round(v)) for v in color)  # type: ignore
 
 
-def _b64_encode_image(image: PILImage, format="png") -> str:
-    buffered = BytesIO()
-    image.save(buffered, format=format)
-    img_str = base64.b64encode(buffered.getvalue()).decode()
-    return img_str
+@lru_cache(maxsize=None)
+def _color_class(prefix: str, *colors: RGBA) -> str:
+    """A CSS class name derived from the colors it styles. Classes with the same name
+    always have the same rule, so they can't conflict when several SVGs are embedded
+    in one document."""
+    return "-".join([prefix, *("".join(f"{v:02x}" for v in c) for c in colors)])
+
+
+# Every possible alpha byte as a (rounded) fraction
+_ALPHA_LUT = tuple(round(i / 255, 3) for i in range(256))
 
 
+@lru_cache(maxsize=None)
 def _alpha_to_percent(rgba: RGBA) -> Tuple[int, int, int, float]:
-    return rgba[0], rgba[1], rgba[2], round(rgba[3] / 255, 3)
+    return rgba[0], rgba[1], rgba[2], _ALPHA_LUT[rgba[3]]
 
 
 DEFAULT_BOX_COLOR = (255, 111, 97, 64)
@@ -58,6 +70,7 @@ DEFAULT_LABEL_BG_COLOR = (245, 223, 77, 196)
 DEFAULT_LABEL_TEXT_COLOR = (102, 103, 171, 255)
 
 
+@lru_cache(maxsize=1)
 def _get_system_font():
     font = None
     for font_name in ["Menlo", "Monaco", "Consolas", "Ubuntu Mono", "Courier New"]:
@@ -73,9 +86,16 @@ def _get_system_font():
     return font
 
 
+@lru_cache(maxsize=None)
+def _load_font(font_name: str, size: int) -> ImageFont.FreeTypeFont:
+    """Load a font once per (name, size), rather than re-reading the font file
+    on every render."""
+    return ImageFont.truetype(font_name, size)
+
+
 def render_boxes_as_image(
     page: PdfPage,
-    boxes: List[Box],
+    boxes: Boxes,
     scale: float = 1.0,
     font_name: Optional[str] = None,
     box_colors: Union[RGBA, List[RGBA], None] = None,
@@ -84,9 +104,7 @@ def render_boxes_as_image(
     label_text_color: Union[RGBA, None] = None,
 ) -> PILImage:
     if box_colors is None:
-        box_colors = list(repeat(DEFAULT_BOX_COLOR, len(boxes)))
-    if isinstance(box_colors, tuple):
-        box_colors = list(repeat(box_colors, len(boxes)))
+        box_colors = DEFAULT_BOX_COLOR
     if box_labels is None:
         box_labels = [str(i) for i in range(len(boxes))]
     if label_bg_color is None:
@@ -96,34 +114,30 @@ def render_boxes_as_image(
     if font_name is None:
         font_name = _get_system_font()
 
-    w, h = page.get_size()
-
-    # We immediately "flip" the page so that the image origin orientation (top-left)
-    # matches the PDF orentation (bottom-left). This way we don't have to transform the
-    # coordiantes every time we want to use them, we just have to make sure we flip back
-    # to image orientation when we're done adding things to that canvas
-    image = page.render_topil(scale=scale).transpose(Image.Transpose.FLIP_TOP_BOTTOM)
-    draw = ImageDraw.Draw(image, mode="RGBA")
-
-    # We need to create a new layer and draw object for text, because we
-    # don't want to 'flip' it back when it's done - otherwise the characters
-    # will be upside-down
-    text_layer = Image.new("RGBA", image.size, (255, 255, 255, 0))
-    draw_text = ImageDraw.Draw(text_layer)
-
-    font = ImageFont.truetype(font_name, int(6 * scale))
+    image = page.render_topil(scale=scale)
+    font = _load_font(font_name, int(6 * scale))
 
-    for box, color in zip(boxes, box_colors):
-        draw.rectangle(box.scale_coords(scale), fill=color)
+    # Convert from PDF (bottom-left origin) to image (top-left origin) coordinates
+    # once, rather than flipping the whole page image and back again. The y values
+    # swap so that (x1, y1) stays the smaller corner. We invert against the rendered
+    # height rather than `h * scale`, since pdfium rounds the render size up.
+    coords = boxes_to_array(boxes) * scale
+    coords[:, [1, 3]] = image.height - coords[:, [3, 1]]
+    centers = (coords[:, :2] + coords[:, 2:]) / 2
 
-    centers = [b.center for b in boxes]
-    for label, c in zip(box_labels, centers):
-        cx, cy = _scale_coords(c, scale)
-        _, _, tw, th = draw_text.textbbox(
-            (0, 0),
-            label,
-            font,
-        )
+    draw = ImageDraw.Draw(image, mode="RGBA")
+    # A single color applies to every box
+    colors = repeat(box_colors) if isinstance(box_colors, tuple) else box_colors
+    for box_coords, color in zip(coords.tolist(), colors):
+        draw.rectangle(box_coords, fill=color)
+
+    # Labels are usually short and repetitive (e.g. box indices), and they all share
+    # the same font, so we only need to measure each distinct label once
+    label_sizes = {}
+    for label, (cx, cy) in zip(box_labels, centers.tolist()):
+        if label not in label_sizes:
+            label_sizes[label] = draw.textbbox((0, 0), label, font)[2:]
+        tw, th = label_sizes[label]
         # We don't want the width/height scaling for the ellipse to be exactly 2,
         # because we want the boundaries to extend a bit beyond the text
         ex1, ey1, ex2, ey2 = (
@@ -133,64 +147,82 @@ def render_boxes_as_image(
             cy + th / 1.5,
         )
         draw.ellipse([ex1, ey1, ex2, ey2], fill=label_bg_color)
-        # the original image is already "inverted" due to the flip transpose, so we need
-        # to invert these coordinates for the text layer
-        cxt, cyt = _invert_coords((cx, cy), h * scale)
-        draw_text.text(
-            (cxt, cyt),
+    # Text goes in a second pass so that no label's ellipse covers another's text
+    for label, (cx, cy) in zip(box_labels, centers.tolist()):
+        draw.text(
+            (cx, cy),
             text=label,
             font=font,
             fill=label_text_color,
             anchor="mm",
         )
-    image = image.transpose(Image.Transpose.FLIP_TOP_BOTTOM)
-    image = Image.alpha_composite(image.convert("RGBA"), text_layer.convert("RGBA"))
     return image
 
 
-svg_page_template = """
-<svg width="{width}" height="{height}" xmlns="http://www.w3.org/2000/svg">
+svg_page_header = """<svg width="{width}" height="{height}" xmlns="http://www.w3.org/2000/svg">
 <defs>
   <style type="text/css">
     text {{
           font-family: monospace;
           font-weight: 700;
     }}
+{css_rules}
   </style>
 </defs>
-<image href="data:image/{img_type};base64,{img_str}" x="0.0" y="0.0" height="100%" width="100%" preserveAspectRatio="none" />
-{svgrects_str}
-{svgcircles_str}
-{textrects_str}
-</svg>
-"""
+<image href="data:image/{img_type};base64,{img_str}" x="0.0" y="0.0" height="100%" width="100%" preserveAspectRatio="none" />"""
+
+svg_page_footer = "</svg>"
+
+svg_fill_rule = "    .{} {{ fill: {}; }}"
+
+svg_label_rule = (
+    "    .{} {{ fill: {}; text-shadow: {}; "
+    "dominant-baseline: middle; text-anchor: middle; }}"
+)
+
+svg_rect_template = '<rect x="{}" y="{}" width="{}" height="{}" class="{}" />'
+
+svg_circle_template = '<circle cx="{}" cy="{}" r="{}" class="{}" />'
+
+svg_text_template = '<text font-size="{}" x="{}" y="{}" class="{}">{}</text>'
 
 
 def render_boxes_as_svg(
     page: PdfPage,
-    boxes: List[Box],
+    boxes: Boxes,
     scale: float = 1.0,
     box_colors: Union[RGBA, List[RGBA], None] = None,
     box_labels: Union[List[str], None] = None,
     label_bg_color: Union[RGBA, None] = None,
     label_text_color: Union[RGBA, None] = None,
-    img_type: Literal["jpeg", "png"] = "png",
+    img_type: Optional[Literal["jpeg", "png"]] = None,
+    image_scale: Optional[float] = None,
 ) -> SVG:
+    """Render `boxes` (and their labels) over `page` as an SVG string.
+
+    The page itself is embedded as a base64 raster. By default it is a JPEG, unless
+    the rendered page has transparency, in which case it is a PNG. `image_scale`
+    sets the resolution of that raster independently of the SVG's `scale` (it is
+    stretched to fill the SVG), so a lower value shrinks the payload when the SVG
+    is only going to be displayed at a small size. It is capped at `scale`."""
     if box_colors is None:
-        box_colors = list(repeat(DEFAULT_BOX_COLOR, len(boxes)))  # type: ignore
-    if isinstance(box_colors, tuple):
-        box_colors = list(repeat(box_colors, len(boxes)))
+        box_colors = DEFAULT_BOX_COLOR
     if box_labels is None:
         box_labels = [str(i) for i in range(len(boxes))]
     if label_bg_color is None:
         label_bg_color = DEFAULT_LABEL_BG_COLOR
-    label_bg_color = _alpha_to_percent(label_bg_color)  # type: ignore
     if label_text_color is None:
         label_text_color = DEFAULT_LABEL_TEXT_COLOR
-    label_text_color = _alpha_to_percent(label_text_color)  # type: ignore
+    label_bg_color = _as_rgba(label_bg_color)
+    label_text_color = _as_rgba(label_text_color)
 
     w, h = page.get_size()
-    image = page.render_topil(scale=scale)
+    if image_scale is None:
+        image_scale = scale
+    image = page.render_topil(scale=min(scale, image_scale))
+    if img_type is None:
+        has_alpha = image.mode in ("RGBA", "LA") or "transparency" in image.info
+        img_type = "png" if has_alpha else "jpeg"
     # We have to base64 encode the original image, rather than provide a relative file
     # reference (which is also supported in SVG `image` elements), beacuse whenever I
     # tried do provide a file reference, it returned the source image upside-down. Plus
@@ -198,64 +230,81 @@ def render_boxes_as_svg(
     # eventually going to serve these visualisations like displaCy does
     b64_image = _b64_encode_image(image, img_type)
 
-    svgrects = []
-    for box, color in zip(boxes, box_colors):  # type: ignore
-        bx, by, bw, bh = _scale_coords(box.to_xywh(), scale)
-        # We need to invert, but also additionally subtract the height so that the
-        # coordinate maps to the upper-left of the box
-        by = (scale * h) - (by + bh)
-        color = _alpha_to_percent(color)
-        rect_text = (
-            f'<rect x="{bx}" '
-            f'y="{by}" '
-            f'width="{bw}" '
-            f'height="{bh}" '
-            f'style="fill:rgba{color}" />'
-        )
-        svgrects.append(rect_text)
-
-    centers = [b.center for b in boxes]
-    svgcircles = []
-    textrects = []
-    for label, c in zip(box_labels, centers):
-        c = _scale_coords(c, scale)
-        cx, cy = _invert_coords(c, scale * h)
-        r = 4 * scale
-
-        text_circle = (
-            f'<circle cx="{cx}" '
-            f'cy="{cy}" '
-            f'r="{r}" '
-            f'style="fill:rgba{label_bg_color}" />'
+    coords = boxes_to_array(boxes)
+    # (x1, y1, x2, y2) -> (x1, y1, width, height), scaled in one pass
+    xywh = coords.copy()
+    xywh[:, 2] -= xywh[:, 0]
+    xywh[:, 3] -= xywh[:, 1]
+    xywh *= scale
+    # We need to invert, but also additionally subtract the height so that the
+    # coordinate maps to the upper-left of the box
+    xywh[:, 1] = (scale * h) - (xywh[:, 1] + xywh[:, 3])
+
+    # Colors are declared once as CSS classes, rather than inlined on every element
+    if isinstance(box_colors, tuple):
+        box_colors = _as_rgba(box_colors)
+        box_classes = repeat(_color_class("box", box_colors))
+        unique_colors = [box_colors]
+    else:
+        box_colors = [_as_rgba(c) for c in box_colors]
+        box_classes = [_color_class("box", c) for c in box_colors]
+        unique_colors = list(dict.fromkeys(box_colors))
+    css_rules = [
+        svg_fill_rule.format(_color_class("box", c), f"rgba{_alpha_to_percent(c)}")
+        for c in unique_colors
+    ]
+    label_bg_class = _color_class("label-bg", label_bg_color)
+    label_class = _color_class("label", label_text_color, label_bg_color)
+    label_bg_str = f"rgba{_alpha_to_percent(label_bg_color)}"
+    text_shadow = (
+        f"-1px 1px 0 {label_bg_str},"
+        f"1px 1px 0 {label_bg_str},"
+        f"1px -1px 0 {label_bg_str},"
+        f"-1px -1px 0 {label_bg_str}"
+    )
+    css_rules.append(svg_fill_rule.format(label_bg_class, label_bg_str))
+    css_rules.append(
+        svg_label_rule.format(
+            label_class, f"rgba{_alpha_to_percent(label_text_color)}", text_shadow
         )
-        svgcircles.append(text_circle)
-
-        text = (
-            f'<text font-size="{6 * scale}" '
-            f'fill="rgba{label_text_color}" '
-            f'x="{cx}" y="{cy}" '
-            'dominant-baseline="middle" '
-            'text-anchor="middle" '
-            f'style="text-shadow: -1px 1px 0 rgba{label_bg_color},'
-            f"1px 1px 0 rgba{label_bg_color},"
-            f"1px -1px 0 rgba{label_bg_color},"
-            f'-1px -1px 0 rgba{label_bg_color}" '
-            'font-weight="bold">'
-            f"{label}"
-            "</text>"
+    )
+
+    # Scaled box centers, inverted to the SVG (top-left) origin
+    centers = (coords[:, :2] + coords[:, 2:]) / 2 * scale
+    centers[:, 1] = (scale * h) - centers[:, 1]
+
+    # Rects, label circles and label text are layered in that order (later elements
+    # draw on top), but all go into a single list that is joined once at the end
+    parts = [
+        svg_page_header.format(
+            width=w * scale,
+            height=h * scale,
+            css_rules="\n".join(css_rules),
+            img_type=img_type,
+            img_str=b64_image,
         )
-        textrects.append(text)
-    svgcircles_str = "\n".join(svgcircles)
-    textrects_str = "\n".join(textrects)
-    svgrects_str = "\n".join(svgrects)
-
-    image = svg_page_template.format(
-        width=w * scale,
-        height=h * scale,
-        img_type=img_type,
-        img_str=b64_image,
-        svgrects_str=svgrects_str,
-        svgcircles_str=svgcircles_str,
-        textrects_str=textrects_str,
-    ).strip()
+    ]
+    rect_fmt = svg_rect_template.format
+    parts.extend(
+        rect_fmt(bx, by, bw, bh, box_class)
+        for (bx, by, bw, bh), box_class in zip(xywh.tolist(), box_classes)
+    )
+
+    centers_l = centers.tolist()
+    circle_fmt = svg_circle_template.format
+    r = 4 * scale
+    parts.extend(
+        circle_fmt(cx, cy, r, label_bg_class)
+        for _, (cx, cy) in zip(box_labels, centers_l)
+    )
+
+    text_fmt = svg_text_template.format
+    font_size = 6 * scale
+    parts.extend(
+        text_fmt(font_size, cx, cy, label_class, label)
+        for label, (cx, cy) in zip(box_labels, centers_l)
+    )
+    parts.append(svg_page_footer)
+
+    image = "\n".join(parts)
     return SVG(image)
@@ -0,0 +1,13 @@
+# Build the Cython extensions in-place with:
+#   python setup.py build_ext --inplace
+from Cython.Build import cythonize
+from setuptools import Extension, setup
+
+extensions = [
+    Extension("box", ["box.pyx"], extra_compile_args=["-O3"]),
+]
+
+setup(
+    name="pdf-sketches",
+    ext_modules=cythonize(extensions, compiler_directives={"language_level": "3"}),
+)